@@ -1,6 +1,39 @@
+import functools
+
 import numpy as np
 import cvxpy
 
+from instrumentation import phase, record_cvxpy_solver
+
+@functools.lru_cache(maxsize=64)
+def build_equilibrium_problem(num_players, num_resources):
+    """
+    The Eisenberg-Gale program for one market shape, with the valuations and budgets as cvxpy parameters.
+    Built once per shape: later solves only assign new parameter values, and cvxpy reuses the canonicalization.
+    Returns (problem, valuations, budgets, allocation), allocation being resources x players.
+    """
+    valuations = cvxpy.Parameter((num_players, num_resources), nonneg=True)
+    budgets = cvxpy.Parameter(num_players, nonneg=True)
+
+    # Create decision variables for allocations
+    allocation = cvxpy.Variable((num_resources, num_players))
+
+    # Utility of every player: allocated amount of each resource times the player's valuation, summed over the
+    # resources. B_i * log(v_i . x_i) multiplies two parameter-dependent terms, which cvxpy cannot parameterize,
+    # so the utilities get their own variable with u_i <= v_i . x_i (tight at the optimum, since log increases).
+    utilities = cvxpy.Variable(num_players)
+
+    constraints = [
+        cvxpy.sum(allocation, axis=1) == 1,  # total allocation per resource sums to 1
+        allocation >= 0,                     # allocations are within [0, 1]
+        allocation <= 1,
+        utilities <= cvxpy.sum(cvxpy.multiply(allocation.T, valuations), axis=1),
+    ]
+
+    # Apply log utility function and scale by the player's budget
+    problem = cvxpy.Problem(cvxpy.Maximize(budgets @ cvxpy.log(utilities)), constraints)
+    return problem, valuations, budgets, allocation
+
 def calculate_equilibrium(matrix, budgets):
     # Perform validation on preference matrix to ensure no negative values
     for row in matrix:
@@ -13,32 +46,20 @@ def calculate_equilibrium(matrix, budgets):
     num_players = len(matrix)
     num_resources = len(matrix[0])
 
-    # Create decision variables for allocations
-    allocation = cvxpy.Variable((num_resources, num_players))
-
-    constraints = []
-    
-    # Ensure total allocation per resource sums to 1, and allocations are within [0, 1]
-    for j in range(num_resources):
-        constraints.append(cvxpy.sum(allocation[j, :]) == 1) # sum the row j
-        for i in range(num_players):
-            constraints.append(allocation[j, i] >= 0)
-            constraints.append(allocation[j, i] <= 1)
-
-    # Compute utility for each player:
-    # - Multiply allocated amount of each resource by the player's valuation
-    # - Sum over all resources to get total utility per player
-    # - Apply log utility function and scale by the player's budget
-    utilities = []
-    for i in range(num_players):
-        player_utility = sum(allocation[j, i] * matrix[i][j] for j in range(num_resources))
-        utilities.append(budgets[i] * cvxpy.log(player_utility))
+    with phase("build"):
+        problem, valuations_param, budgets_param, allocation = build_equilibrium_problem(num_players, num_resources)
+        valuations_param.value = np.array(matrix, dtype=float)
+        budgets_param.value = np.array(budgets, dtype=float)
 
     # Solve optimization problem to maximize utility
-    problem = cvxpy.Problem(cvxpy.Maximize(cvxpy.sum(utilities)), constraints)
-    problem.solve()
-
-    return problem.value, allocation.value
+    with phase("solve"):
+        problem.solve()
+    record_cvxpy_solver(problem)
+
+    with phase("extract"):
+        # The problem is shared by all calls with this shape, so hand out a copy of the solution
+        allocation_value = None if allocation.value is None else allocation.value.copy()
+    return problem.value, allocation_value
 
 def calculate_resource_prices(matrix, allocation, budgets):
     num_players = len(matrix)
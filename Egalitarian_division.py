@@ -1,15 +1,25 @@
+import functools
+
 import cvxpy 
 import numpy 
 
+from allocation_certificates import utilities as allocation_utilities
+from instrumentation import phase, record_cvxpy_solver
+
 # shay kronfeld- 322234782
 
-def Egalitarian_division(matrix):
-    values = numpy.array(matrix) # Convert input list to a NumPy array 
-    num_peoples, num_resources = values.shape # Get the number of people (agents) and number of resources
-    
+@functools.lru_cache(maxsize=64)
+def build_egalitarian_problem(num_peoples, num_resources):
+    """
+    The egalitarian LP for one shape, with the valuations as a cvxpy parameter.
+    Built once per shape: later solves only assign new valuations, and cvxpy reuses the canonicalization.
+    Returns (problem, values, x).
+    """
+    values = cvxpy.Parameter((num_peoples, num_resources))
+
     # Create a CVXPY variable for the allocation matrix
     x = cvxpy.Variable((num_peoples, num_resources))
-    
+
     # Calculate the utilities for each person based on the allocation
     # cvxpy.multiply(x, values): multiplication of allocation matrix and valuation matrix
     # axis=1: sums across each row (i.e., for each person), returning a vector of total utilities
@@ -17,25 +27,34 @@ def Egalitarian_division(matrix):
 
     # Create a variable to represent the minimum utility to be maximized
     min_utility = cvxpy.Variable()
-    
+
     constraints = [
         cvxpy.sum(x, axis=0) == 1,  # Each resource is fully allocated
         x >= 0,                  # Cannot allocate negative amounts (for each element in the matrix) 
         x <= 1,                  # Cannot allocate more than 1 unit (for each element in the matrix)
+        min_utility <= utilities,  # The minimum utility is less than or equal to each person's utility
     ]
-    
-    # Add constraints to ensure the minimum utility is less than or equal to each person's utility
-    for i in range(num_peoples):
-        constraints.append(min_utility <= utilities[i])
-    
+
     # Define the optimization problem 
     problem = cvxpy.Problem(cvxpy.Maximize(min_utility), constraints)
-    problem.solve()
+    return problem, values, x
+
+
+def Egalitarian_division(matrix):
+    values = numpy.array(matrix, dtype=float) # Convert input list to a NumPy array 
+    num_peoples, num_resources = values.shape # Get the number of people (agents) and number of resources
+    
+    with phase("build"):
+        problem, values_param, x = build_egalitarian_problem(num_peoples, num_resources)
+        values_param.value = values
+
+    with phase("solve"):
+        problem.solve()
+    record_cvxpy_solver(problem)
     # After solving, all CVXPY variables (e.g., x, min_utility) hold their solution in `.value`
 
-    results = []
-    for i in range(num_peoples):
-        results.append([x[i, j].value for j in range(num_resources)])
+    with phase("extract"):
+        results = x.value.tolist()
     return results, problem.value
 
 
@@ -59,7 +78,7 @@ def print_test_result(test_name, result, matrix):
         
         print(f"\nOptimal Minimum Utility: {optimal_value:.2f}")
         
-        utilities = [sum(allocations[i][j] * matrix[i][j] for j in range(num_resources)) for i in range(num_peoples)]
+        utilities = allocation_utilities(allocations, matrix)
         print("\nUtilities:")
         for i in range(num_peoples):
             print(f"Agent #{i+1} has utility: {utilities[i]:.2f}")
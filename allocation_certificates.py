@@ -0,0 +1,121 @@
+import numpy as np
+
+# Vectorized fairness / efficiency checks for allocations.
+#
+# Conventions (same as Egalitarian_division):
+#   valuations: (num_players, num_resources)
+#   allocation: (num_players, num_resources), or a batch (batch, num_players, num_resources)
+# calculate_equilibrium returns its allocation as (num_resources, num_players): pass allocation.T.
+#
+# Every function accepts a single allocation or a batch and returns arrays with the same leading batch shape.
+
+
+def utilities(allocation, valuations) -> np.ndarray:
+    """
+    Utility of every player for their own bundle: shape (..., num_players).
+    """
+    allocation = np.asarray(allocation, dtype=np.float64)
+    valuations = np.asarray(valuations, dtype=np.float64)
+    return np.einsum("...ij,ij->...i", allocation, valuations)
+
+
+def envy_matrix(allocation, valuations) -> np.ndarray:
+    """
+    envy[..., i, k] = v_i(bundle of k) - v_i(own bundle of i). The allocation is envy-free iff all entries are <= 0.
+    Needs num_players^2 memory per allocation; use max_envy() for very large instances.
+    """
+    allocation = np.asarray(allocation, dtype=np.float64)
+    valuations = np.asarray(valuations, dtype=np.float64)
+    cross_values = valuations @ np.swapaxes(allocation, -1, -2)  # value of player i for the bundle of k
+    own_values = np.diagonal(cross_values, axis1=-2, axis2=-1)
+    return cross_values - own_values[..., :, None]
+
+
+def max_envy(allocation, valuations, chunk_size: int = 1024) -> np.ndarray:
+    """
+    Largest envy of every player towards any other player: shape (..., num_players).
+    Processes chunk_size players at a time, so memory stays at chunk_size x num_players per allocation.
+    """
+    allocation = np.asarray(allocation, dtype=np.float64)
+    valuations = np.asarray(valuations, dtype=np.float64)
+    own_values = utilities(allocation, valuations)
+    result = np.empty_like(own_values)
+
+    for start in range(0, valuations.shape[0], chunk_size):
+        stop = start + chunk_size
+        cross_values = valuations[start:stop] @ np.swapaxes(allocation, -1, -2)
+        result[..., start:stop] = cross_values.max(axis=-1) - own_values[..., start:stop]
+    return result
+
+
+def proportionality_slack(allocation, valuations, budgets=None) -> np.ndarray:
+    """
+    u_i - share_i * v_i(all resources), where share_i = 1/n (or budget_i / sum of budgets).
+    The allocation is proportional iff all entries are >= 0.
+    """
+    valuations = np.asarray(valuations, dtype=np.float64)
+    num_players = valuations.shape[0]
+    if budgets is None:
+        shares = np.full(num_players, 1 / num_players)
+    else:
+        budgets = np.asarray(budgets, dtype=np.float64)
+        shares = budgets / budgets.sum()
+    return utilities(allocation, valuations) - shares * valuations.sum(axis=1)
+
+
+def min_utility(allocation, valuations) -> np.ndarray:
+    """
+    Egalitarian value (utility of the weakest player) of every allocation: shape (...).
+    """
+    return utilities(allocation, valuations).min(axis=-1)
+
+
+def clearing_residuals(allocation, valuations, budgets, prices) -> dict:
+    """
+    Residuals of the Fisher market equilibrium conditions. All of them are ~0 (or <= 0) at an equilibrium:
+    - supply:   sum_i x[i,j] - 1 for every resource j (every resource is sold out)
+    - spending: sum_j p[j] * x[i,j] - budget_i for every player i (every budget is spent)
+    - bang_per_buck: (max_j v[i,j] / p[j]) / (u_i / budget_i) - 1 for every player i (~0: the player
+                     only buys resources with the best value per unit of money)
+    """
+    allocation = np.asarray(allocation, dtype=np.float64)
+    valuations = np.asarray(valuations, dtype=np.float64)
+    budgets = np.asarray(budgets, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(prices > 0, valuations / prices, np.where(valuations > 0, np.inf, 0.0))
+    return {
+        "supply": allocation.sum(axis=-2) - 1,
+        "spending": allocation @ prices - budgets,
+        "bang_per_buck": ratios.max(axis=-1) * budgets / utilities(allocation, valuations) - 1,
+    }
+
+
+def verify_allocation(allocation, valuations, budgets=None, prices=None, tol: float = 1e-6) -> dict:
+    """
+    Runs all checks at once and returns the raw vectors plus a boolean verdict per property.
+    Market clearing is only checked when both budgets and prices are given.
+    """
+    utility_vector = utilities(allocation, valuations)
+    envy = max_envy(allocation, valuations)
+    slack = proportionality_slack(allocation, valuations, budgets)
+
+    report = {
+        "utilities": utility_vector,
+        "min_utility": utility_vector.min(axis=-1),
+        "max_envy": envy,
+        "proportionality_slack": slack,
+        "envy_free": np.all(envy <= tol, axis=-1),
+        "proportional": np.all(slack >= -tol, axis=-1),
+    }
+
+    if budgets is not None and prices is not None:
+        residuals = clearing_residuals(allocation, valuations, budgets, prices)
+        report["clearing_residuals"] = residuals
+        report["market_clears"] = (
+            np.all(np.abs(residuals["supply"]) <= tol, axis=-1)
+            & np.all(np.abs(residuals["spending"]) <= tol * np.maximum(1, np.abs(budgets)), axis=-1)
+            & np.all(residuals["bang_per_buck"] <= tol, axis=-1)
+        )
+    return report
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+# Load generator for allocation_service.py: opens `connections` client connections, keeps `concurrency`
+# requests in flight on each, and reports p50 / p99 latency and throughput.
+
+
+def make_payload(job_type: str, num_players: int, num_resources: int) -> dict:
+    if job_type == "equilibrium":
+        return {
+            "valuations": [[random.randint(1, 10) for _ in range(num_resources)] for _ in range(num_players)],
+            "budgets": [random.randint(1, 100) for _ in range(num_players)],
+        }
+    if job_type == "egalitarian":
+        return {"valuations": [[random.randint(0, 100) for _ in range(num_resources)] for _ in range(num_players)]}
+    if job_type == "rent":
+        return {
+            "valuations": [[-random.randint(1, 100) for _ in range(num_players)] for _ in range(num_players)],
+            "budget": 1000,
+        }
+    if job_type == "budget":
+        budget = [random.randint(0, 100) for _ in range(num_resources)]
+        preferences = [random.sample(range(num_resources), random.randint(1, num_resources)) for _ in range(num_players)]
+        return {"budget": budget, "preferences": preferences}
+    raise ValueError(f"unknown job type: {job_type}")
+
+
+async def run_connection(host, port, job_types, requests_per_connection, concurrency, num_players, num_resources,
+                         latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent_at = {}
+    in_flight = asyncio.Semaphore(concurrency)
+
+    async def send_all():
+        for request_id in range(requests_per_connection):
+            await in_flight.acquire()
+            job_type = random.choice(job_types)
+            request = {"id": request_id, "type": job_type, "payload": make_payload(job_type, num_players, num_resources)}
+            sent_at[request_id] = time.perf_counter()
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+
+    async def receive_all():
+        for _ in range(requests_per_connection):
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+            if not response["ok"]:
+                errors.append(response["error"])
+            in_flight.release()
+
+    await asyncio.gather(send_all(), receive_all())
+    writer.close()
+
+
+async def run_load(host="127.0.0.1", port=8765, job_types=("egalitarian",), connections=8,
+                   requests_per_connection=50, concurrency=4, num_players=3, num_resources=3):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_connection(host, port, list(job_types), requests_per_connection, concurrency, num_players,
+                       num_resources, latencies, errors)
+        for _ in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"Requests: {len(latencies)} ({len(errors)} errors) in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/second")
+    print(f"Latency p50: {np.percentile(latencies_ms, 50):.1f} ms, p99: {np.percentile(latencies_ms, 99):.1f} ms")
+    if errors:
+        print(f"First error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for allocation_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--types", default="egalitarian", help="comma separated: equilibrium,egalitarian,rent,budget")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="requests per connection")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight per connection")
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--resources", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run_load(args.host, args.port, args.types.split(","), args.connections, args.requests,
+                         args.concurrency, args.players, args.resources))
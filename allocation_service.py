@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+# Asyncio front end for the allocation algorithms.
+#
+# Protocol: newline-delimited JSON over TCP. Every request line is
+#     {"id": <any>, "type": "equilibrium" | "egalitarian" | "rent" | "budget", "payload": {...}}
+# and is answered (possibly out of order) by one line
+#     {"id": <same id>, "ok": true, "result": {...}}   or   {"id": <same id>, "ok": false, "error": "..."}
+#
+# Payloads:
+#     equilibrium: {"valuations": [[...]], "budgets": [...]}          -> calculate_equilibrium
+#     egalitarian: {"valuations": [[...]]}                            -> Egalitarian_division
+#     rent:        {"valuations": [[...]], "budget": <number>}        -> find_envy_free_payments
+#     budget:      {"budget": [...], "preferences": [[...], ...]}     -> find_decomposition
+#
+# Requests of the same type and shape that arrive within batch_window seconds are grouped into one
+# micro-batch. A batch is split into one chunk per worker, so its jobs still run in parallel, and every chunk
+# is solved by a single task in the worker process pool: the per-task overhead (pickling, scheduling,
+# interpreter wake-up) is paid once per chunk, and equilibrium / egalitarian jobs of one shape re-solve the
+# worker's parameterized cvxpy problem for that shape (build_equilibrium_problem / build_egalitarian_problem
+# are cached per shape) instead of building and compiling a new one per job.
+# Backpressure: the job queue is bounded and at most max_inflight_batches chunks are in the pool; when
+# both are full, the server stops reading from the connection until a slot frees up.
+# On stop(), jobs that were queued or waiting for a batch are answered with an error.
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _solve_equilibrium(payload):
+    from Calculating_competitive_equilibrium import calculate_equilibrium, calculate_resource_prices
+
+    valuations = np.array(payload["valuations"], dtype=float)
+    budgets = np.array(payload["budgets"], dtype=float)
+    value, allocation = calculate_equilibrium(valuations, budgets)
+    prices = calculate_resource_prices(valuations, allocation, budgets)
+    return {"value": value, "allocation": allocation.T, "prices": prices}
+
+
+def _solve_egalitarian(payload):
+    from Egalitarian_division import Egalitarian_division
+
+    allocation, min_utility = Egalitarian_division(payload["valuations"])
+    return {"allocation": allocation, "min_utility": min_utility}
+
+
+@functools.lru_cache(maxsize=256)
+def _prepared_rent_division(valuations: tuple):
+    from division_N_assignments_for_N_persons import PreparedRentDivision
+
+    try:
+        return PreparedRentDivision(np.array(valuations))
+    except ValueError:
+        return None
+
+
+def _solve_rent(payload):
+    # The same players and tasks with a different budget are answered from the prepared division, without an LP
+    prepared = _prepared_rent_division(tuple(map(tuple, payload["valuations"])))
+    if prepared is None:
+        return {"assignment": None, "payments": None}
+    return {"assignment": prepared.assignment, "payments": prepared.payments(payload["budget"])}
+
+
+def _solve_budget(payload):
+    from partical_budgeting import find_decomposition
+
+    preferences = [set(p) for p in payload["preferences"]]
+    return {"decomposition": find_decomposition(payload["budget"], preferences, verbose=False)}
+
+
+SOLVERS = {
+    "equilibrium": _solve_equilibrium,
+    "egalitarian": _solve_egalitarian,
+    "rent": _solve_rent,
+    "budget": _solve_budget,
+}
+
+
+def _warm_up():
+    # Pool initializer: import the solver modules (and cvxpy) before the first request, not during it
+    import Calculating_competitive_equilibrium  # noqa: F401
+    import division_N_assignments_for_N_persons  # noqa: F401
+    import Egalitarian_division  # noqa: F401
+    import partical_budgeting  # noqa: F401
+
+
+def _run_batch(job_type: str, payloads: List[dict]) -> List[dict]:
+    """
+    Runs in a worker process: solves every job of one micro-batch and returns one response per job.
+    """
+    solver = SOLVERS[job_type]
+    responses = []
+    for payload in payloads:
+        try:
+            responses.append({"ok": True, "result": _jsonable(solver(payload))})
+        except Exception as e:  # one bad request must not fail the whole batch
+            responses.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    return responses
+
+
+def _batch_key(job_type: str, payload: dict):
+    # Jobs are only batched with jobs of the same type and input shape
+    if job_type == "budget":
+        return job_type, len(payload["budget"]), len(payload["preferences"])
+    return (job_type,) + np.shape(payload["valuations"])
+
+
+def _fail(futures: List[asyncio.Future], message: str):
+    for future in futures:
+        if not future.done():
+            future.set_result({"ok": False, "error": message})
+
+
+class AllocationService:
+    """
+    Micro-batching dispatcher in front of a process pool.
+
+    Args:
+        workers: number of worker processes (default: os.cpu_count())
+        batch_window: seconds to wait for more same-shape jobs after the first job of a batch arrives
+        max_batch_size: a batch is dispatched as soon as it has this many jobs
+        max_queue_size: bound of the job queue (backpressure once it is full)
+        max_inflight_batches: bound on batch chunks running or waiting in the pool
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_window: float = 0.005, max_batch_size: int = 32,
+                 max_queue_size: int = 1024, max_inflight_batches: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self.max_inflight_batches = max_inflight_batches or 2 * self.workers
+        self.batches_dispatched = 0
+        self.jobs_completed = 0
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._batcher_task = None
+        self._batch_tasks = set()
+        self._pending = {}  # batches being collected by the batcher, answered with an error on stop()
+        self._closed = False
+
+    async def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        # Worker processes are started lazily; start (and warm up) all of them before accepting requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)])
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.max_inflight_batches)
+        self._batcher_task = asyncio.create_task(self._batcher())
+
+    async def stop(self):
+        self._closed = True
+        self._batcher_task.cancel()
+        await asyncio.gather(self._batcher_task, return_exceptions=True)
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+        # Jobs that never reached the pool: still being batched, or still in the queue
+        for _, _, futures in self._pending.values():
+            _fail(futures, "service is shutting down")
+        self._pending.clear()
+        while not self._queue.empty():
+            _fail([self._queue.get_nowait()[3]], "service is shutting down")
+        # Waiting for the worker processes to exit must not block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._pool.shutdown)
+
+    async def enqueue(self, job_type: str, payload: dict) -> asyncio.Future:
+        """
+        Puts a job on the queue (waiting while the queue is full) and returns a future for its response.
+        """
+        if job_type not in SOLVERS:
+            raise ValueError(f"unknown job type: {job_type}")
+        if self._closed:
+            raise RuntimeError("service is shutting down")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((_batch_key(job_type, payload), job_type, payload, future))
+        if self._closed:
+            # stop() may already have drained the queue while this put was waiting for room
+            _fail([future], "service is shutting down")
+        return future
+
+    async def submit(self, job_type: str, payload: dict) -> dict:
+        return await (await self.enqueue(job_type, payload))
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, job_type, payload, future = await self._queue.get()
+            pending = self._pending
+            pending[key] = (job_type, [payload], [future])
+            deadline = loop.time() + self.batch_window
+
+            # Collect more jobs until the window closes; full batches leave immediately
+            while True:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    key, job_type, payload, future = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch = pending.setdefault(key, (job_type, [], []))
+                batch[1].append(payload)
+                batch[2].append(future)
+                if len(batch[1]) >= self.max_batch_size:
+                    await self._dispatch(*pending[key])
+                    del pending[key]
+
+            # A batch leaves `pending` only once it is dispatched, so stop() can answer everything still in it
+            for key in list(pending):
+                await self._dispatch(*pending[key])
+                del pending[key]
+
+    async def _dispatch(self, job_type: str, payloads: List[dict], futures: List[asyncio.Future]):
+        self.batches_dispatched += 1
+        # One chunk per worker: same-shape jobs share a worker's parameterized problem, but do not queue up
+        # behind each other on one process while the others are idle
+        num_chunks = min(len(payloads), self.workers)
+        for chunk in range(num_chunks):
+            await self._slots.acquire()  # backpressure: wait for a free slot in the pool
+            task = asyncio.create_task(self._run(job_type, payloads[chunk::num_chunks], futures[chunk::num_chunks]))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run(self, job_type: str, payloads: List[dict], futures: List[asyncio.Future]):
+        try:
+            responses = await asyncio.get_running_loop().run_in_executor(self._pool, _run_batch, job_type, payloads)
+        except Exception as e:
+            responses = [{"ok": False, "error": f"{type(e).__name__}: {e}"}] * len(futures)
+        finally:
+            self._slots.release()
+        for future, response in zip(futures, responses):
+            if not future.done():
+                future.set_result(response)
+        self.jobs_completed += len(futures)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        reply_tasks = set()
+
+        async def reply(request_id, future):
+            response = dict(await future, id=request_id)
+            async with write_lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                    # Awaiting here (not in a task) is what propagates backpressure to the client
+                    future = await self.enqueue(request["type"], request["payload"])
+                except Exception as e:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_result({"ok": False, "error": f"bad request: {e}"})
+                task = asyncio.create_task(reply(request_id, future))
+                reply_tasks.add(task)
+                task.add_done_callback(reply_tasks.discard)
+            await asyncio.gather(*reply_tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, **service_options):
+    service = AllocationService(**service_options)
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Allocation service listening on {host}:{port} ({service.workers} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching allocation service (newline-delimited JSON over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-queue-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, workers=args.workers, batch_window=args.batch_window_ms / 1000,
+                      max_batch_size=args.max_batch_size, max_queue_size=args.max_queue_size))
@@ -1,6 +1,8 @@
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import maximum_bipartite_matching
 
 def plot_bipartite_graph(matrix, title, highlight_edges=None):
     """
@@ -47,60 +49,73 @@ def plot_bipartite_graph(matrix, title, highlight_edges=None):
     plt.axis('off')
     plt.show()
 
+def find_bottleneck_matching(residual, threshold=1e-8):
+    """
+    Finds a perfect matching on the entries above `threshold` that maximizes its smallest entry.
+    Binary search over the sorted positive entries: the largest t for which the entries >= t still contain a
+    perfect matching is the bottleneck value. Returns (min_val, permutation), permutation[i] = column of row i.
+    """
+    n = residual.shape[0]
+    rows, cols = np.nonzero(residual > threshold)
+    weights = residual[rows, cols]
+    candidates = np.unique(weights)
+
+    def matching_at(level):
+        keep = weights >= level
+        graph = csr_array((np.ones(keep.sum()), (rows[keep], cols[keep])), shape=(n, n))
+        return maximum_bipartite_matching(graph, perm_type="column")
+
+    if len(candidates) == 0 or np.any(matching_at(candidates[0]) < 0):
+        raise ValueError("the residual has no perfect matching; D must be doubly stochastic.")
+
+    # candidates[low] always admits a perfect matching, candidates[high] (if in range) never does
+    low, high = 0, len(candidates)
+    permutation = matching_at(candidates[0])
+    while high - low > 1:
+        middle = (low + high) // 2
+        matching = matching_at(candidates[middle])
+        if np.all(matching >= 0):
+            low, permutation = middle, matching
+        else:
+            high = middle
+    return residual[np.arange(n), permutation].min(), permutation
+
 def find_best_matching(residual):
     """
     Finds a perfect matching in the bipartite graph that maximizes the minimum weight.
     """
     n = residual.shape[0]
-    G = nx.Graph()
-    G.add_nodes_from(range(n), bipartite=0)
-    G.add_nodes_from(range(n, 2*n), bipartite=1)
-    
-    # Add edges with weights from the residual matrix
-    for i in range(n):
-        for j in range(n):
-            if residual[i, j] > 1e-8:
-                G.add_edge(i, n + j, weight=residual[i, j])
-    
-    # Find a perfect matching
-    matching = nx.algorithms.bipartite.maximum_matching(G, top_nodes=range(n))
-    
-    # Construct the permutation matrix and find matching weights
+    min_val, permutation = find_bottleneck_matching(residual)
+
+    # Construct the permutation matrix and the edges to highlight in the plot
     perm_matrix = np.zeros((n, n), dtype=np.float64)
-    highlight_edges = []
-    matching_weights = []
-    
-    for i in range(n):
-        j = matching.get(i)
-        if j is not None:
-            j_idx = j - n  # Convert back to original index
-            perm_matrix[i, j_idx] = 1
-            matching_weights.append(residual[i, j_idx])
-            highlight_edges.append((f"L{i+1}", f"R{j_idx+1}"))
-    
-    # Find the minimum weight in the matching
-    min_val = min(matching_weights) if matching_weights else 0
+    perm_matrix[np.arange(n), permutation] = 1
+    highlight_edges = [(f"L{i+1}", f"R{j+1}") for i, j in enumerate(permutation)]
+
     # Round to avoid floating point precision issues
     min_val = round(min_val, 10)
     
     return min_val, perm_matrix, highlight_edges
 
-def birkhoff_von_neumann_decomposition(D):
+def birkhoff_von_neumann_decomposition(D, verbose=True):
     """
     Performs the Birkhoff-von Neumann decomposition on a doubly stochastic matrix D.
     Returns a list of (weight, permutation matrix) pairs.
+    verbose: print and plot every step (set to False when D comes from sinkhorn_preprocessing.prepare_for_birkhoff
+    or another program and only the decomposition is needed).
     """
     n = D.shape[0]
     # Make a copy of D with higher precision to avoid floating-point errors
     residual = D.copy().astype(np.float64)
     decomposition = []
 
-    # Print the initial matrix
-    print("Initial matrix:")
-    print(np.round(residual, 1))
-    print()
+    if verbose:
+        # Print the initial matrix
+        print("Initial matrix:")
+        print(np.round(residual, 1))
+        print()
 
-    plot_bipartite_graph(residual, "Initial Graph with Weights")
+        plot_bipartite_graph(residual, "Initial Graph with Weights")
 
     iteration = 1
     while np.any(residual > 1e-8):
@@ -110,34 +125,80 @@ def birkhoff_von_neumann_decomposition(D):
         # Add this permutation with its weight to our decomposition
         decomposition.append((min_val, perm_matrix))
         
-        # Print current step information
-        print(f"Step {iteration}:")
-        print(f"Weight: {min_val:.1f}")
-        print("Permutation matrix:")
-        print(perm_matrix.astype(int))
+        if verbose:
+            # Print current step information
+            print(f"Step {iteration}:")
+            print(f"Weight: {min_val:.1f}")
+            print("Permutation matrix:")
+            print(perm_matrix.astype(int))
         
         # Subtract this permutation from the residual
         residual -= min_val * perm_matrix
         # Clean up small floating point errors in residual
         residual = np.round(residual, 10)
         
-        # Print the updated residual
-        print("Residual matrix:")
-        print(np.round(residual, 1))
-        print()
-        
-        plot_bipartite_graph(residual, f"Step {iteration}: Matching with weight {min_val:.1f}", highlight_edges)
+        if verbose:
+            # Print the updated residual
+            print("Residual matrix:")
+            print(np.round(residual, 1))
+            print()
+            
+            plot_bipartite_graph(residual, f"Step {iteration}: Matching with weight {min_val:.1f}", highlight_edges)
         iteration += 1
 
-    # Print final decomposition
-    print("Final decomposition:")
-    for idx, (weight, P) in enumerate(decomposition):
-        print(f"P{idx+1} = {weight:.1f} * ")
-        print(P.astype(int))
-        print()
+    if verbose:
+        # Print final decomposition
+        print("Final decomposition:")
+        for idx, (weight, P) in enumerate(decomposition):
+            print(f"P{idx+1} = {weight:.1f} * ")
+            print(P.astype(int))
+            print()
 
     return decomposition
 
+class BirkhoffTermStream:
+    """
+    Streaming Birkhoff-von Neumann decomposition: iterating yields (weight, permutation) terms as they are found,
+    where permutation[i] is the column matched to row i. Each term costs one bottleneck matching (a binary
+    search of O(log nnz) sparse matchings), so the first usable lottery is available without building the
+    whole decomposition, and the terms come out with large weights first in practice.
+
+    Args:
+        D: doubly stochastic matrix (e.g. from sinkhorn_preprocessing.prepare_for_birkhoff)
+        target_weight: stop once the yielded weights cover this much of the probability mass (e.g. 0.99)
+        max_terms: stop after this many terms
+
+    covered_weight, residual_mass and terms are kept up to date while iterating, so after an early stop
+    residual_mass tells how much probability mass was left undecomposed.
+    """
+
+    def __init__(self, D, target_weight=1.0, max_terms=None):
+        self.residual = np.array(D, dtype=np.float64)
+        self.target_weight = target_weight
+        self.max_terms = max_terms
+        self.covered_weight = 0.0
+        # Mass of one row (1 for a doubly stochastic matrix); every term removes `weight` from each row
+        self.total_mass = self.residual.sum() / self.residual.shape[0]
+        self.terms = 0
+
+    @property
+    def residual_mass(self):
+        return max(self.total_mass - self.covered_weight, 0.0)
+
+    def __iter__(self):
+        rows = np.arange(self.residual.shape[0])
+        while (np.any(self.residual > 1e-8) and self.covered_weight < self.target_weight
+               and (self.max_terms is None or self.terms < self.max_terms)):
+            # Bottleneck matching: every term removes as much mass as possible, so few terms cover most of it
+            min_val, permutation = find_bottleneck_matching(self.residual)
+
+            # Only the n matched entries change, so only they are updated (and cleaned up)
+            self.residual[rows, permutation] = np.round(self.residual[rows, permutation] - min_val, 10)
+            self.covered_weight += min_val
+            self.terms += 1
+            yield min_val, permutation
+
+
 # Example usage
 if __name__ == "__main__":
     # Create a 4x4 doubly stochastic matrix
@@ -163,3 +224,9 @@ if __name__ == "__main__":
         print("Decomposition is correct! The original matrix matches the sum of the weighted permutation matrices.")
     else:
         print("Decomposition error! The original matrix differs from the sum of the weighted permutation matrices.")
+
+    # Streaming: stop as soon as 90% of the probability mass is covered
+    stream = BirkhoffTermStream(D, target_weight=0.9)
+    for weight, permutation in stream:
+        print(f"Weight {weight:.1f}: rows 1..{len(permutation)} -> columns {permutation + 1}")
+    print(f"{stream.terms} terms cover {stream.covered_weight:.2f}, residual mass {stream.residual_mass:.2f}")
@@ -0,0 +1,171 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from instrumentation import current_metrics, phase
+
+# Out-of-core Fisher market equilibrium for valuation matrices that do not fit in RAM.
+#
+# The valuations are read from a .npy file through a memory map (float32 files are fine: every chunk is
+# converted to float64 only while it is processed) and buyers are handled chunk_size rows at a time, so
+# peak memory is O(chunk_size * num_resources + num_players + num_resources) instead of O(n x m).
+#
+# calculate_equilibrium solves the Eisenberg-Gale convex program with cvxpy, which needs the whole matrix.
+# Here the same equilibrium is reached with proportional response dynamics:
+#     x[i,j] = b[i,j] / p[j]                 (allocation from bids)
+#     b[i,j] <- B_i * v[i,j] * x[i,j] / u_i   (every buyer re-bids in proportion to the utility received)
+#     p[j]    = sum_i b[i,j]
+# Unrolling the update shows that after t rounds (starting from uniform bids)
+#     b[i,:] = B_i * softmax(t * log v[i,:] - L),   L[j] = sum of log p[j] over the previous rounds,
+# so the bids never have to be stored: one vector L of length num_resources is the whole state.
+
+
+def save_valuations(path: str, matrix, dtype=np.float32, chunk_size: int = 4096):
+    """
+    Writes a valuation matrix (players x resources) to a .npy file that can be memory-mapped, chunk by chunk.
+    """
+    num_players, num_resources = np.shape(matrix)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(num_players, num_resources))
+    for start in range(0, num_players, chunk_size):
+        out[start:start + chunk_size] = np.asarray(matrix[start:start + chunk_size], dtype=dtype)
+    out.flush()
+    del out
+
+
+def _chunk_bids(values: np.ndarray, budgets: np.ndarray, rounds: int, log_price_sum: np.ndarray) -> np.ndarray:
+    # b[i,:] = B_i * softmax(rounds * log v[i,:] - L); zero valuations never receive a bid
+    with np.errstate(divide="ignore"):
+        scores = rounds * np.log(values) - log_price_sum if rounds > 0 else np.where(values > 0, 0.0, -np.inf)
+    # A buyer who values nothing has no finite score and places no bids
+    top = scores.max(axis=1, keepdims=True)
+    weights = np.exp(scores - np.where(np.isfinite(top), top, 0.0))
+    totals = weights.sum(axis=1, keepdims=True)
+    return budgets[:, None] * np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+
+def calculate_equilibrium_out_of_core(valuations_path: str, budgets, chunk_size: int = 4096,
+                                      max_iterations: int = 1000, tol: float = 1e-6,
+                                      allocation_path: Optional[str] = None):
+    """
+    Computes equilibrium prices and utilities for the valuations stored in `valuations_path`.
+
+    Args:
+        valuations_path: .npy file of shape (num_players, num_resources), float32 or float64
+        budgets: budget of every player
+        chunk_size: number of buyers processed at once
+        max_iterations: maximum number of proportional response rounds
+        tol: stop once no price changes by more than this fraction between rounds
+        allocation_path: if given, the allocation (players x resources) is written to this .npy file
+
+    Returns:
+        prices, utilities, stats - where stats holds iterations, converged, seconds and buyers_per_second
+    """
+    valuations = np.load(valuations_path, mmap_mode="r")
+    budgets = np.asarray(budgets, dtype=np.float64)
+    num_players, num_resources = valuations.shape
+
+    if len(budgets) != num_players:
+        raise ValueError("the number of players must be equal to the number of budgets.")
+    if max_iterations < 1:
+        raise ValueError("max_iterations must be at least 1.")
+
+    metrics = current_metrics()
+    log_price_sum = np.zeros(num_resources)
+    last_log_price_sum = log_price_sum
+    prices = None
+    converged = False
+    iterations = 0
+    start_time = time.perf_counter()
+
+    with phase("iterate"):
+        while iterations < max_iterations:
+            # One pass over the buyers: the prices of this round are the column sums of the bids
+            new_prices = np.zeros(num_resources)
+            for start in range(0, num_players, chunk_size):
+                values = np.asarray(valuations[start:start + chunk_size], dtype=np.float64)
+                if iterations == 0 and np.any(values < 0):
+                    raise ValueError("the matrix cannot contain negative values.")
+                new_prices += _chunk_bids(values, budgets[start:start + chunk_size], iterations,
+                                          log_price_sum).sum(axis=0)
+            iterations += 1
+
+            last_log_price_sum = log_price_sum.copy()
+            # Goods nobody values keep price 0 and stay out of L: their bids are 0 through log v = -inf already,
+            # and log 0 = -inf in L would turn every later score into NaN
+            log_price_sum += np.log(np.where(new_prices > 0, new_prices, 1.0))
+            if prices is not None:
+                positive = (new_prices > 0) | (prices > 0)
+                change = np.abs(new_prices[positive] - prices[positive]) / np.maximum(new_prices[positive],
+                                                                                      prices[positive])
+                # Nothing to compare (or NaN prices) is not convergence
+                if change.size > 0 and np.all(np.isfinite(change)) and change.max() <= tol:
+                    prices = new_prices
+                    converged = True
+                    break
+            prices = new_prices
+
+    # Final pass: utilities (and optionally the allocation) for the last prices
+    utilities = np.empty(num_players)
+    allocation = None
+    if allocation_path is not None:
+        allocation = np.lib.format.open_memmap(allocation_path, mode="w+", dtype=np.float64,
+                                               shape=(num_players, num_resources))
+    with phase("extract"):
+        safe_prices = np.where(prices > 0, prices, 1.0)
+        for start in range(0, num_players, chunk_size):
+            values = np.asarray(valuations[start:start + chunk_size], dtype=np.float64)
+            # Rebuild the bids of the last round, whose column sums are exactly `prices`
+            x = _chunk_bids(values, budgets[start:start + chunk_size], iterations - 1,
+                            last_log_price_sum) / safe_prices
+            utilities[start:start + chunk_size] = np.sum(x * values, axis=1)
+            if allocation is not None:
+                allocation[start:start + chunk_size] = x
+        if allocation is not None:
+            allocation.flush()
+
+    seconds = time.perf_counter() - start_time
+    buyers_processed = num_players * (iterations + 1)
+    if metrics is not None:
+        metrics.increment("buyers_processed", buyers_processed)
+
+    stats = {
+        "iterations": iterations,
+        "converged": converged,
+        "seconds": seconds,
+        "buyers_per_second": buyers_processed / seconds if seconds > 0 else float("inf"),
+    }
+    return prices, utilities, stats
+
+
+def run_example_out_of_core(valuations_path: str, budgets, title: str = "", chunk_size: int = 4096):
+    prices, utilities, stats = calculate_equilibrium_out_of_core(valuations_path, budgets, chunk_size=chunk_size)
+
+    print(f"\n--- {title} ---\n")
+    print(f"Players: {len(utilities)}, resources: {len(prices)}")
+    print(f"Iterations: {stats['iterations']} (converged: {stats['converged']})")
+    print(f"Throughput: {stats['buyers_per_second']:,.0f} buyers/second")
+
+    print("\nFirst resource prices:")
+    for j in range(min(len(prices), 5)):
+        print(f"  Resource {j+1}: Price = {prices[j]:.4f}")
+
+    print("\n" + "-" * 25 + "\n")
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    num_players, num_resources = 20000, 200
+    path = os.path.join(tempfile.mkdtemp(), "valuations.npy")
+
+    # Build the file chunk by chunk, as a producer of a too-large-for-RAM matrix would
+    matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(num_players, num_resources))
+    for start in range(0, num_players, 4096):
+        matrix[start:start + 4096] = rng.uniform(0, 10, size=(min(4096, num_players - start), num_resources))
+    matrix.flush()
+    del matrix
+
+    run_example_out_of_core(path, np.full(num_players, 1.0), title="Random market (float32 memory-mapped)")
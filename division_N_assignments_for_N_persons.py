@@ -2,48 +2,114 @@ import cvxpy as cp
 import numpy as np
 import itertools
 
-# Define the utility matrix v[i][j]: disutility (negative) of player i for task j
-v = np.array([
-    [-700, -400, -300],  # Player 1
-    [-5, -6, -4],  # Player 2
-    [-6, -1, -3]   # Player 3
-])
+def find_envy_free_payments(v, budget):
+    """
+    Tries all task assignments (permutations) and returns (assignment, payments) for the first assignment
+    that admits envy-free payments summing to `budget`, or None if there is no such assignment.
 
-n = v.shape[0]
-budget = 1000
+    Args:
+        v: the utility matrix v[i][j]: disutility (negative) of player i for task j
+        budget: the total amount the payments must sum to
+    """
+    v = np.asarray(v)
+    n = v.shape[0]
 
-# Try all task assignments (permutations)
-assignments = list(itertools.permutations(range(n)))
+    # Try all task assignments (permutations)
+    for assignment in itertools.permutations(range(n)):
+        p = cp.Variable(n)
+        constraints = []
 
-proof_found = False  # Will be set to True if one feasible solution is found
+        # Envy-free constraints: p_j - p_i <= v_i(t_i) - v_i(t_j)
+        for i in range(n):
+            for j in range(n):
+                delta = v[i, assignment[i]] - v[i, assignment[j]]
+                constraints.append(p[j] - p[i] <= delta)
+
+        # Budget constraint
+        constraints.append(cp.sum(p) == budget)
+
+        # Solve the LP
+        prob = cp.Problem(cp.Minimize(0), constraints)
+        prob.solve()
+
+        if prob.status == "optimal":
+            return assignment, p.value  # One solution is enough to prove feasibility
+
+    return None
+
+class PreparedRentDivision:
+    """
+    Envy-free assignment and payments for a fixed utility matrix, answering any budget without a solver call.
 
-for assignment in assignments:
-    p = cp.Variable(n)
-    constraints = []
+    The envy-free constraints only involve differences p_j - p_i, so adding the same constant to every
+    payment keeps them satisfied: once one envy-free payment vector is known for some budget, the
+    payments for a new budget are that vector shifted by (new_budget - base_budget) / n.
+    The assignment and the base payments are computed once, in the constructor, or taken from an existing
+    find_envy_free_payments result with from_result.
+    """
 
-    # Envy-free constraints: p_j - p_i <= v_i(t_i) - v_i(t_j)
-    for i in range(n):
-        for j in range(n):
-            delta = v[i, assignment[i]] - v[i, assignment[j]]
-            constraints.append(p[j] - p[i] <= delta)
+    def __init__(self, v, base_budget=0):
+        result = find_envy_free_payments(np.asarray(v), base_budget)
+        if result is None:
+            raise ValueError("no assignment admits envy-free payments.")
+        self._set(v, result, base_budget)
 
-    # Budget constraint
-    constraints.append(cp.sum(p) == budget)
+    @classmethod
+    def from_result(cls, v, result, budget):
+        """
+        Wraps an (assignment, payments) result of find_envy_free_payments(v, budget), without solving again.
+        """
+        if result is None:
+            raise ValueError("no assignment admits envy-free payments.")
+        prepared = cls.__new__(cls)
+        prepared._set(v, result, budget)
+        return prepared
 
-    # Solve the LP
-    prob = cp.Problem(cp.Minimize(0), constraints)
-    result = prob.solve()
+    def _set(self, v, result, base_budget):
+        self.v = np.asarray(v)
+        self.n = self.v.shape[0]
+        self.assignment, base_payments = result
+        self.base_budget = base_budget
+        self.base_payments = np.asarray(base_payments, dtype=float)
 
-    if prob.status == "optimal":
+    def payments(self, budget):
+        """
+        Envy-free payments summing to `budget`, in O(n).
+        """
+        return self.base_payments + (budget - self.base_budget) / self.n
+
+    def payments_batch(self, budgets):
+        """
+        Envy-free payments for every budget in `budgets`: an array of shape (len(budgets), n).
+        """
+        shifts = (np.asarray(budgets, dtype=float) - self.base_budget) / self.n
+        return self.base_payments[None, :] + shifts[:, None]
+
+if __name__ == "__main__":
+    # Define the utility matrix v[i][j]: disutility (negative) of player i for task j
+    v = np.array([
+        [-700, -400, -300],  # Player 1
+        [-5, -6, -4],  # Player 2
+        [-6, -1, -3]   # Player 3
+    ])
+
+    n = v.shape[0]
+    budget = 1000
+
+    result = find_envy_free_payments(v, budget)
+
+    if result is None:
+        print("No feasible assignment found — contradiction to the assumption!")
+    else:
+        assignment, payments = result
         print(f"\n Feasible envy-free solution FOUND for assignment: {assignment}")
         for i in range(n):
             task = assignment[i]
-            print(f"Player {i+1} → Task {task+1}, Utility: {v[i, task]}, Payment: {p.value[i]:.2f}")
-        print(f"Total payments: {sum(p.value):.2f}")
-        proof_found = True
-        break  # One solution is enough to prove feasibility
-
-if not proof_found:
-    print("No feasible assignment found — contradiction to the assumption!")
-else:
-    print("\n This proves that the system of constraints is feasible under at least one assignment.")
+            print(f"Player {i+1} → Task {task+1}, Utility: {v[i, task]}, Payment: {payments[i]:.2f}")
+        print(f"Total payments: {sum(payments):.2f}")
+        print("\n This proves that the system of constraints is feasible under at least one assignment.")
+
+        # Other budgets for the same players and tasks: shift the payments instead of solving again
+        prepared = PreparedRentDivision.from_result(v, result, budget)
+        for new_budget, new_payments in zip([500, 2000], prepared.payments_batch([500, 2000])):
+            print(f"Budget {new_budget}: payments {np.round(new_payments, 2)}")
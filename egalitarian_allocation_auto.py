@@ -0,0 +1,93 @@
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from egalitarian_allocation_with_pruning_a import egalitarian_allocation
+from egalitarian_allocation_dp import egalitarian_allocation_dp
+from egalitarian_allocation_milp import egalitarian_allocation_milp
+from egalitarian_allocation_symmetry import egalitarian_allocation_symmetric
+
+# Picks the engine for the indivisible egalitarian allocation problem by instance size.
+# The backtracking search explores up to num_players ** num_items leaves, while the MILP engine pays a
+# fixed overhead of a few HiGHS solves. BACKTRACKING_MAX_LEAVES is the crossover measured with
+# run_crossover_benchmark() (random integer valuations in 1..100): MILP first wins at 3 players x 12 items
+# (3^12 leaves) and 4 players x 9 items (4^9 leaves); with 2 players backtracking won up to 12 items.
+BACKTRACKING_MAX_LEAVES = 200_000
+
+# The DP engine keeps at most (num_items * max_value + 1) ** (num_players - 1) utility vectors per item.
+# Measured against MILP (random valuations): DP wins clearly up to a few thousand states
+# (3 players x 20 items in 1..3: 0.06s vs 0.21s) and loses from ~1e5 (3 players x 30 items in 1..10: 4.0s vs 0.3s).
+DP_MAX_STATES = 20_000
+
+ENGINES = {
+    "backtracking": egalitarian_allocation,
+    "dp": egalitarian_allocation_dp,
+    "milp": egalitarian_allocation_milp,
+    "symmetric": egalitarian_allocation_symmetric,  # never chosen by "auto": ties may resolve to a symmetric copy
+}
+
+
+def choose_engine(valuations) -> str:
+    values = np.asarray(valuations)
+    num_players, num_items = values.shape
+    if num_players ** num_items <= BACKTRACKING_MAX_LEAVES:
+        return "backtracking"
+
+    # DP only for small non-negative integer valuations (the same setting the search's Rule B assumes)
+    integral = values.dtype.kind in "biu" or bool(np.all(values == np.round(values)))
+    if integral and values.min() >= 0:
+        estimated_states = float(num_items * values.max() + 1) ** (num_players - 1)
+        if estimated_states <= DP_MAX_STATES:
+            return "dp"
+    return "milp"
+
+
+def egalitarian_allocation_auto(valuations: List[List[int]], engine: str = "auto") -> Tuple[List[List[int]], int]:
+    """
+    Same contract as egalitarian_allocation. engine is "auto" or a key of ENGINES.
+    """
+    if engine == "auto":
+        engine = choose_engine(valuations)
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine}")
+    return ENGINES[engine](valuations)
+
+
+def run_crossover_benchmark(player_counts=(2, 3, 4), max_items=12, repeats=3, max_seconds=5.0):
+    """
+    Times backtracking and MILP on random instances and prints, for every player count, the first number
+    of items at which the MILP engine beats backtracking.
+    """
+    for num_players in player_counts:
+        print(f"\n{num_players} players:")
+        print(f"{'items':>6} {'backtracking (ms)':>18} {'milp (ms)':>10}")
+        crossover = None
+        skip_backtracking = False
+
+        for num_items in range(1, max_items + 1):
+            times = {"backtracking": 0.0, "milp": 0.0}
+            for _ in range(repeats):
+                valuations = [[random.randint(1, 100) for _ in range(num_items)] for _ in range(num_players)]
+                for name in ("backtracking", "milp"):
+                    engine = ENGINES[name]
+                    if name == "backtracking" and skip_backtracking:
+                        times[name] = float("inf")
+                        continue
+                    start = time.perf_counter()
+                    engine(valuations)
+                    times[name] += (time.perf_counter() - start) * 1000 / repeats
+
+            # Stop timing backtracking once it gets too slow; it only gets slower from here
+            if times["backtracking"] > max_seconds * 1000:
+                skip_backtracking = True
+            if crossover is None and times["milp"] < times["backtracking"]:
+                crossover = num_items
+            print(f"{num_items:>6} {times['backtracking']:>18.2f} {times['milp']:>10.2f}")
+
+        print(f"MILP faster from {crossover} items" if crossover else "backtracking faster on all sizes")
+
+
+if __name__ == "__main__":
+    run_crossover_benchmark()
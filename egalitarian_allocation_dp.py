@@ -0,0 +1,152 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from instrumentation import current_metrics, phase
+
+# Dynamic-programming engine for the indivisible egalitarian allocation problem with small integer valuations.
+#
+# Instead of walking the num_players ** num_items assignment tree, the items are processed one at a time and
+# only the set of reachable utility vectors (one row per state) is kept, as a NumPy array.
+# The number of distinct vectors is bounded by (num_items * value_range) ** (num_players - 1), so for a
+# small value range the running time is polynomial in items x value range.
+#
+# The result is identical to egalitarian_allocation, including its tie-breaking:
+# - States are kept in the order in which the backtracking search first reaches them, so the first state
+#   is always the one with the lexicographically smallest assignment (Rule A keeps exactly that one).
+# - A state is only dropped when it can never produce the returned allocation:
+#     * bound:     even if every player got all remaining items, its minimum stays below the minimum of a
+#                  greedily completed allocation (Rule B, valuations >= 0 only)
+#     * dominance: another state is strictly better for every player, so every completion of it has a
+#                  strictly larger minimum
+# The allocation is recovered by following the back-pointers (parent state, player) from the chosen final state.
+
+
+def _strictly_dominated(states: np.ndarray, num_candidates: int) -> np.ndarray:
+    """
+    Marks the states for which one of the `num_candidates` states with the largest minimum is strictly
+    larger in every coordinate. Checking against a few strong candidates keeps the cost at
+    O(len(states) * num_candidates * num_players) instead of quadratic.
+    """
+    num_states, num_players = states.shape
+    if num_states <= 1:
+        return np.zeros(num_states, dtype=bool)
+
+    k = min(num_candidates, num_states)
+    candidates = states[np.argpartition(-states.min(axis=1), k - 1)[:k]]
+
+    dominated = np.empty(num_states, dtype=bool)
+    block = max(1, 1_000_000 // (k * num_players))
+    for start in range(0, num_states, block):
+        chunk = states[start:start + block]
+        dominated[start:start + block] = np.any(np.all(candidates[None, :, :] > chunk[:, None, :], axis=2), axis=1)
+    return dominated
+
+
+def _greedy_lower_bound(states: np.ndarray, values: np.ndarray, next_item: int) -> int:
+    """
+    Completes the given states greedily (every remaining item goes to the currently weakest player) and
+    returns the best resulting minimum. It is the value of a real allocation, so it never exceeds the optimum.
+    """
+    scores = states.copy()
+    rows = np.arange(len(scores))
+    for j in range(next_item, values.shape[1]):
+        weakest = np.argmin(scores, axis=1)
+        scores[rows, weakest] += values[weakest, j]
+    return scores.min(axis=1).max()
+
+
+def _unique_first(children: np.ndarray, radix: np.ndarray) -> np.ndarray:
+    """
+    Indices of the first occurrence of every distinct row, in order of appearance.
+    Rows are packed into one int64 key when the score ranges allow it (much faster than unique over rows).
+    """
+    if radix is not None:
+        keys = children @ radix
+        _, first = np.unique(keys, return_index=True)
+    else:
+        _, first = np.unique(children, axis=0, return_index=True)
+    first.sort()
+    return first
+
+
+def egalitarian_allocation_dp(valuations: List[List[int]], dominance_candidates: int = 64) -> Tuple[List[List[int]], int]:
+    """
+    Same contract as egalitarian_allocation, for integer valuations.
+    """
+    values = np.asarray(valuations)
+    if values.dtype.kind not in "biu" and not np.all(values == np.round(values)):
+        raise ValueError("the DP engine requires integer valuations.")
+    int_values = values.astype(np.int64)
+    num_players, num_items = values.shape
+
+    if num_items == 0:
+        return [[] for _ in range(num_players)], 0
+
+    metrics = current_metrics()
+    nonnegative = int_values.min() >= 0
+
+    # remaining[j, i] = value of items j..num_items-1 for player i (row num_items is all zeros)
+    remaining = np.zeros((num_items + 1, num_players), dtype=np.int64)
+    remaining[:num_items] = np.cumsum(int_values[:, ::-1], axis=1)[:, ::-1].T
+
+    # Mixed-radix packing of a utility vector into one int64 (None if the key space is too large)
+    lowest = np.minimum(int_values, 0).sum(axis=1)
+    span = np.maximum(int_values, 0).sum(axis=1) - lowest + 1
+    radix = None
+    if np.prod(span.astype(float)) < 2 ** 62:
+        radix = np.concatenate(([1], np.cumprod(span[:-1]))).astype(np.int64)
+
+    states = np.zeros((1, num_players), dtype=np.int64)
+    parents = []  # parents[j][s] = index (in layer j-1) of the state that state s of layer j came from
+    owners = []   # owners[j][s]  = player that received item j on the way to state s
+    lower_bound = None
+    gains = np.eye(num_players, dtype=np.int64)
+
+    with phase("search"):
+        for j in range(num_items):
+            # Children in backtracking order: parent by parent, and player 0..n-1 within a parent
+            children = (states[:, None, :] + gains * int_values[:, j]).reshape(-1, num_players)
+
+            # Rule A: keep only the first occurrence of every utility vector
+            first = _unique_first(children - lowest if radix is not None else children, radix)
+            children = children[first]
+            keep = np.ones(len(children), dtype=bool)
+
+            if nonnegative:
+                # Greedy completion of the strongest states gives a minimum that is certainly achievable
+                strongest = children[np.argsort(-children.min(axis=1), kind="stable")[:dominance_candidates]]
+                best_min = _greedy_lower_bound(strongest, int_values, j + 1)
+                lower_bound = best_min if lower_bound is None else max(lower_bound, best_min)
+                upper_bound = (children + remaining[j + 1]).min(axis=1)
+                keep &= upper_bound >= lower_bound
+                if metrics is not None:
+                    metrics.increment("dp_bound_prunes", int(np.count_nonzero(~keep)))
+
+            dominated = _strictly_dominated(children, dominance_candidates) & keep
+            keep &= ~dominated
+            if metrics is not None:
+                metrics.increment("dp_dominance_prunes", int(np.count_nonzero(dominated)))
+                metrics.increment("dp_states", int(np.count_nonzero(keep)))
+
+            states = children[keep]
+            parents.append(first[keep] // num_players)
+            owners.append(first[keep] % num_players)
+
+    # Choose the final state exactly like the backtracking search: highest minimum, then smallest index
+    # of the weakest player, then the first state (lexicographically smallest assignment)
+    mins = states.min(axis=1)
+    weakest = np.argmax(states == mins[:, None], axis=1)
+    candidates = np.flatnonzero(mins == mins.max())
+    chosen = candidates[np.argmin(weakest[candidates])]  # argmin returns the first index on ties
+
+    allocation = [[] for _ in range(num_players)]
+    state = chosen
+    for j in range(num_items - 1, -1, -1):
+        allocation[owners[j][state]].append(j)
+        state = parents[j][state]
+    for items in allocation:
+        items.reverse()
+
+    min_value = mins[chosen].item()
+    return allocation, (min_value if values.dtype.kind in "biu" else float(min_value))
@@ -0,0 +1,140 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import csr_matrix, hstack
+
+from instrumentation import current_metrics, phase, record_scipy_result
+
+# Exact MILP engine for the indivisible egalitarian (max-min) allocation problem.
+#
+# Variables: binary x[i,j] = 1 if item j goes to player i (stored at index i * num_items + j), plus t.
+#   maximize t
+#   s.t.  sum_i x[i,j] == 1                 for every item j
+#         sum_j v[i,j] * x[i,j] >= t        for every player i
+#
+# The answer is made identical to egalitarian_allocation (the backtracking search), including its tie-breaking:
+#   1. maximize the minimum utility t*
+#   2. among those allocations, the weakest player (first index with utility t*) has the smallest index
+#   3. among those, the lexicographically smallest assignment (item 0's player, item 1's player, ...),
+#      which is the first one the backtracking search reaches.
+# Stages 2 and 3 are solved as a short sequence of feasibility MILPs on top of stage 1.
+
+
+def _build_matrices(values: np.ndarray):
+    num_players, num_items = values.shape
+    num_vars = num_players * num_items
+    cols = np.arange(num_vars)
+
+    # Row j of `assign` sums the variables of item j over all players
+    assign = csr_matrix((np.ones(num_vars), (cols % num_items, cols)), shape=(num_items, num_vars))
+    # Row i of `utility` is player i's utility: sum_j v[i,j] * x[i,j]
+    utility = csr_matrix((values.ravel(), (cols // num_items, cols)), shape=(num_players, num_vars))
+    return assign, utility
+
+
+def _allocation_from_x(x: np.ndarray, num_players: int, num_items: int) -> np.ndarray:
+    # Returns owner[j] = index of the player that receives item j
+    return np.argmax(np.round(x[:num_players * num_items]).reshape(num_players, num_items), axis=0)
+
+
+def _solve(c, constraints, integrality, bounds):
+    with phase("solve"):
+        res = milp(c, constraints=constraints, integrality=integrality, bounds=bounds)
+    record_scipy_result(res)
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.increment("milp_solves")
+    return res
+
+
+def egalitarian_allocation_milp(valuations: List[List[int]]) -> Tuple[List[List[int]], int]:
+    """
+    Same contract as egalitarian_allocation: returns (allocation, min_value), where allocation[i] is the
+    sorted list of items given to player i and min_value is the utility of the weakest player.
+    """
+    values = np.asarray(valuations)
+    num_players, num_items = values.shape
+
+    if num_items == 0:
+        return [[] for _ in range(num_players)], 0
+
+    integral = values.dtype.kind in "biu" or bool(np.all(values == np.round(values)))
+    # Smallest utility difference that counts as "strictly greater" (exact for integer valuations)
+    gap = 1 if integral else 1e-9 * max(1.0, float(np.abs(values).max()))
+
+    with phase("build"):
+        assign, utility = _build_matrices(values.astype(np.float64))
+        num_vars = num_players * num_items
+        x_integrality = np.ones(num_vars)
+        assign_constraint = LinearConstraint(assign, 1, 1)
+
+    # ---------- Stage 1: maximize the minimum utility t ----------
+    c = np.zeros(num_vars + 1)
+    c[-1] = -1  # milp minimizes, so minimize -t
+    stage1 = [
+        LinearConstraint(hstack([assign, csr_matrix((num_items, 1))]), 1, 1),
+        LinearConstraint(hstack([utility, csr_matrix(-np.ones((num_players, 1)))]), 0, np.inf),
+    ]
+    res = _solve(c, stage1, np.append(x_integrality, 0),
+                 Bounds(np.append(np.zeros(num_vars), -np.inf), np.append(np.ones(num_vars), np.inf)))
+    if not res.success:
+        raise RuntimeError(f"MILP solver failed: {res.message}")
+
+    owner = _allocation_from_x(res.x, num_players, num_items)
+    scores = values[owner, np.arange(num_items)]
+    player_scores = np.array([scores[owner == i].sum() for i in range(num_players)])
+    min_value = player_scores.min()
+
+    # Objective used by the feasibility problems below: prefer low player indices on early items,
+    # so the solver's own solution usually already is the lexicographically smallest one.
+    item_weight = (num_items - np.arange(num_items)).astype(np.float64)
+    lex_objective = (np.arange(num_players)[:, None] * item_weight[None, :]).ravel()
+
+    def feasible(weakest: int, fixed: np.ndarray, fixed_count: int) -> Optional[np.ndarray]:
+        """
+        Returns an owner vector with min utility == min_value, first weakest player == `weakest`
+        and the first `fixed_count` items assigned as in `fixed`, or None if none exists.
+        """
+        lower = np.full(num_players, min_value - (0 if integral else gap), dtype=np.float64)
+        upper = np.full(num_players, np.inf)
+        lower[:weakest] = min_value + gap
+        upper[weakest] = min_value + (0 if integral else gap)
+
+        var_lower = np.zeros(num_vars)
+        for j in range(fixed_count):
+            var_lower[fixed[j] * num_items + j] = 1
+
+        res = _solve(lex_objective,
+                     [assign_constraint, LinearConstraint(utility, lower, upper)],
+                     x_integrality,
+                     Bounds(var_lower, np.ones(num_vars)))
+        if not res.success:
+            return None
+        return _allocation_from_x(res.x, num_players, num_items)
+
+    # ---------- Stage 2: smallest possible index of the weakest player ----------
+    # The stage-1 solution already has its weakest player at `first_weakest`, so only smaller indices need a check
+    first_weakest = int(np.argmax(player_scores == min_value))
+    best_owner = owner
+    weakest = first_weakest
+    for k in range(first_weakest):
+        candidate = feasible(k, owner, 0)
+        if candidate is not None:
+            weakest, best_owner = k, candidate
+            break
+
+    # ---------- Stage 3: lexicographically smallest assignment ----------
+    # Fix items one by one to the smallest player that still admits a completion.
+    # The incumbent completion proves feasibility of its own choice, so only smaller players are probed.
+    for j in range(num_items):
+        for p in range(best_owner[j]):
+            trial = best_owner.copy()
+            trial[j] = p
+            candidate = feasible(weakest, trial, j + 1)
+            if candidate is not None:
+                best_owner = candidate
+                break
+
+    allocation = [np.flatnonzero(best_owner == i).tolist() for i in range(num_players)]
+    return allocation, min_value.item()
@@ -0,0 +1,154 @@
+import random
+from typing import Dict, List, Tuple
+
+from egalitarian_allocation_with_pruning_a import egalitarian_allocation
+from instrumentation import collect_metrics, current_metrics, phase
+
+# Egalitarian search (Rules A and B of egalitarian_allocation) with symmetry breaking:
+#
+# - Identical items (equal valuation columns) are made adjacent, and within such a group the items must go to
+#   players in non-decreasing index order. Only the count each player receives is branched on.
+# - Identical players (equal valuation rows) are opened in index order: a player of a group may only receive
+#   its first item if the previous player of the group already has one.
+#
+# Both rules keep the lexicographically smallest copy of every allocation (under swapping identical items and
+# identical players), so no allocation value is lost: the result has the same optimal minimum as
+# egalitarian_allocation. At the leaves the bundles of identical players are re-ordered by utility (weakest
+# first), which also reproduces its tie-breaking on the weakest player's index. Among several allocations that
+# tie on both, the returned one may differ from egalitarian_allocation's by such a symmetry.
+
+
+def _groups(keys: List[tuple]) -> List[List[int]]:
+    # Indices grouped by equal keys, groups ordered by their first index
+    groups: Dict[tuple, List[int]] = {}
+    for idx, key in enumerate(keys):
+        groups.setdefault(key, []).append(idx)
+    return list(groups.values())
+
+
+def egalitarian_allocation_symmetric(valuations: List[List[int]]) -> Tuple[List[List[int]], int]:
+    num_players = len(valuations)
+    num_items = len(valuations[0])
+
+    # Processing order: identical items next to each other
+    item_groups = _groups([tuple(valuations[p][j] for p in range(num_players)) for j in range(num_items)])
+    order = [j for group in item_groups for j in group]
+    values = [[valuations[p][j] for j in order] for p in range(num_players)]
+    group_of = {j: g for g, group in enumerate(item_groups) for j in group}
+    same_as_previous_item = [k > 0 and group_of[order[k]] == group_of[order[k - 1]] for k in range(num_items)]
+
+    # previous_twin[p] = previous player with the same valuations as p (None for the first of a group)
+    player_groups = _groups([tuple(row) for row in valuations])
+    previous_twin = [None] * num_players
+    for group in player_groups:
+        for a, b in zip(group, group[1:]):
+            previous_twin[b] = a
+    twin_groups = [group for group in player_groups if len(group) > 1]
+    twin_players = [p for group in twin_groups for p in group]
+
+    best_result = {
+        "min_value": float('-inf'),
+        "allocation": [[] for _ in range(num_players)],
+    }
+    best_min_player = None
+    visited_states = set()
+    metrics = current_metrics()
+
+    def canonical(player_scores: List[int]) -> List[int]:
+        # bundle_of[p] = player whose bundle p receives: identical players sorted by utility (stable, weakest first)
+        bundle_of = list(range(num_players))
+        for group in twin_groups:
+            for p, q in zip(group, sorted(group, key=lambda q: player_scores[q])):
+                bundle_of[p] = q
+        return bundle_of
+
+    def backtrack(item_index: int, current_allocation: List[List[int]], player_scores: List[int], last_player: int):
+        nonlocal best_min_player
+
+        if metrics is not None:
+            metrics.increment("nodes_visited")
+
+        # Rule A: prune duplicate states. The players allowed from here on also depend on which identical
+        # players are still empty and, inside a group of identical items, on who got the previous copy.
+        state = (item_index, tuple(player_scores), tuple(not current_allocation[p] for p in twin_players),
+                 last_player if item_index < num_items and same_as_previous_item[item_index] else None)
+        if state in visited_states:
+            if metrics is not None:
+                metrics.increment("rule_a_hits")
+            return
+        visited_states.add(state)
+
+        if item_index == num_items:
+            bundle_of = canonical(player_scores)
+            scores = [player_scores[q] for q in bundle_of]
+            min_value = min(scores)
+            min_player = scores.index(min_value)
+
+            if (min_value > best_result["min_value"] or
+                (min_value == best_result["min_value"] and
+                 (best_min_player is None or min_player < best_min_player))):
+                best_result["min_value"] = min_value
+                best_result["allocation"] = [sorted(order[k] for k in current_allocation[q]) for q in bundle_of]
+                best_min_player = min_player
+                if metrics is not None:
+                    metrics.increment("incumbent_updates")
+            return
+
+        # Rule B: Optimistic Bound
+        weakest_player = player_scores.index(min(player_scores))
+        remaining_value = sum(values[weakest_player][k] for k in range(item_index, num_items))
+        if player_scores[weakest_player] + remaining_value < best_result["min_value"]:
+            if metrics is not None:
+                metrics.increment("rule_b_prunes")
+            return
+
+        # Identical items: continue from the player that got the previous copy of this item
+        first_player = last_player if same_as_previous_item[item_index] else 0
+        for p in range(first_player, num_players):
+            # Identical players: open an empty bundle only after the previous identical player has one
+            twin = previous_twin[p]
+            if twin is not None and not current_allocation[p] and not current_allocation[twin]:
+                continue
+
+            current_allocation[p].append(item_index)
+            player_scores[p] += values[p][item_index]
+
+            backtrack(item_index + 1, current_allocation, player_scores, p)
+
+            current_allocation[p].pop()
+            player_scores[p] -= values[p][item_index]
+
+    with phase("search"):
+        backtrack(0, [[] for _ in range(num_players)], [0] * num_players, 0)
+    return best_result["allocation"], best_result["min_value"]
+
+
+def run_symmetry_benchmark(seed: int = 0):
+    """
+    Compares the nodes explored with and without symmetry breaking on instances with repeated rows / columns.
+    """
+    random.seed(seed)
+    column = lambda n: [random.randint(1, 1000) for _ in range(n)]
+    instances = {
+        "3 identical players, 8 items": [column(8)] * 3,
+        "2 players, 12 items in 3 types": [[v for v in column(3) for _ in range(4)] for _ in range(2)],
+        "4 players (2 types), 8 items (4 types)": (lambda rows: [rows[0], rows[0], rows[1], rows[1]])(
+            [[v for v in column(4) for _ in range(2)] for _ in range(2)]),
+        "no symmetry, 3 players, 8 items": [column(8) for _ in range(3)],
+    }
+
+    print(f"{'instance':<42} {'nodes (plain)':>14} {'nodes (symmetric)':>18} {'reduction':>10}")
+    for name, valuations in instances.items():
+        with collect_metrics() as plain:
+            _, plain_value = egalitarian_allocation(valuations)
+        with collect_metrics() as symmetric:
+            _, symmetric_value = egalitarian_allocation_symmetric(valuations)
+        assert plain_value == symmetric_value
+
+        plain_nodes = plain.counters["nodes_visited"]
+        symmetric_nodes = symmetric.counters["nodes_visited"]
+        print(f"{name:<42} {plain_nodes:>14} {symmetric_nodes:>18} {plain_nodes / symmetric_nodes:>9.1f}x")
+
+
+if __name__ == "__main__":
+    run_symmetry_benchmark()
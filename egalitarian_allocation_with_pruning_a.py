@@ -1,6 +1,16 @@
 from typing import List, Tuple
 
-def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]], int]:
+import numpy as np
+
+from instrumentation import current_metrics, phase
+
+def egalitarian_allocation(valuations: List[List[int]], batch_leaf_items: int = 0) -> Tuple[List[List[int]], int]:
+    """
+    Args:
+        valuations: valuations[i][j] is the value of item j for player i
+        batch_leaf_items: if k > 0, the last k items are not assigned one recursive call at a time: all
+            num_players ** k completions are scored at once as a NumPy array (same result, same tie-breaking)
+    """
     num_players = len(valuations)                 # Number of players (agents)
     num_items = len(valuations[0])                # Number of items to allocate
 
@@ -12,6 +22,54 @@ def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]]
 
     visited_states = set()  # ← Set for pruning identical states (Rule A)
 
+    metrics = current_metrics()  # None unless called inside collect_metrics(); the counters below are skipped then
+
+    # ---------- Batched leaves: every completion of the last k items, precomputed once ----------
+    # completion_owners[c, t] = player receiving item (first_batched_item + t) in completion c. Completions are
+    # in the order the recursion would visit them (the first remaining item changes slowest).
+    # completion_gains[c, i] = value player i collects in completion c.
+    batch_leaf_items = min(batch_leaf_items, num_items)
+    first_batched_item = num_items - batch_leaf_items
+    if batch_leaf_items > 0:
+        values = np.asarray(valuations)
+        completion_owners = np.indices((num_players,) * batch_leaf_items).reshape(batch_leaf_items, -1).T
+        completion_gains = np.zeros((len(completion_owners), num_players), dtype=values.dtype)
+        rows = np.arange(len(completion_owners))
+        for t in range(batch_leaf_items):
+            owners = completion_owners[:, t]
+            completion_gains[rows, owners] += values[owners, first_batched_item + t]
+
+    def evaluate_leaf_batch(current_allocation: List[List[int]], player_scores: List[int]):
+        """
+        Scores all completions of the last batch_leaf_items items at once and updates the best result with the
+        first completion that the recursion would have accepted.
+        """
+        nonlocal best_min_player
+
+        scores = completion_gains + np.asarray(player_scores)
+        mins = scores.min(axis=1)
+        weakest = np.argmax(scores == mins[:, None], axis=1)   # first index of the weakest player
+
+        best_of_batch = mins.max()
+        candidates = np.flatnonzero(mins == best_of_batch)
+        c = candidates[np.argmin(weakest[candidates])]        # argmin returns the earliest completion on ties
+        min_value, min_player = mins[c].item(), int(weakest[c])
+
+        if metrics is not None:
+            metrics.increment("batched_leaves", len(scores))
+
+        if (min_value > best_result["min_value"] or
+            (min_value == best_result["min_value"] and
+             (best_min_player is None or min_player < best_min_player))):
+            best_result["min_value"] = min_value
+            allocation = [list(p) for p in current_allocation]
+            for t, owner in enumerate(completion_owners[c]):
+                allocation[owner].append(first_batched_item + t)
+            best_result["allocation"] = allocation
+            best_min_player = min_player
+            if metrics is not None:
+                metrics.increment("incumbent_updates")
+
     def backtrack(item_index: int, current_allocation: List[List[int]], player_scores: List[int]):
         """
         Recursive backtracking function to explore all possible allocations.
@@ -23,10 +81,15 @@ def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]]
         """
         nonlocal best_min_player  # Allows the recursive inner function to change the variable in the main function
 
+        if metrics is not None:
+            metrics.increment("nodes_visited")
+
         # ---------- Rule A: Prune duplicate states ----------
         # Skip this state if it was already visited (same item index + same utility vector)
         state = (item_index, tuple(player_scores))
         if state in visited_states:
+            if metrics is not None:
+                metrics.increment("rule_a_hits")
             return  # identical state — skip it
         visited_states.add(state)
         # ----------------------------------------------------
@@ -48,6 +111,8 @@ def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]]
                 best_result["allocation"] = [list(p) for p in current_allocation]
 
                 best_min_player = min_player
+                if metrics is not None:
+                    metrics.increment("incumbent_updates")
             return
 
         # Rule B: Optimistic Bound (Pruning based on the weakest player's potential)
@@ -58,6 +123,13 @@ def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]]
 
         # If the best possible value for the weakest player in the current path is less than the current best minimum value, prune this branch
         if optimistic < best_result["min_value"]:
+            if metrics is not None:
+                metrics.increment("rule_b_prunes")
+            return
+
+        # Hybrid mode: score all completions of the remaining items in one NumPy step
+        if batch_leaf_items > 0 and item_index == first_batched_item:
+            evaluate_leaf_batch(current_allocation, player_scores)
             return
 
         # Try assigning the current item to each player
@@ -73,16 +145,18 @@ def egalitarian_allocation(valuations: List[List[int]]) -> Tuple[List[List[int]]
             player_scores[p] -= valuations[p][item_index]
 
     # Start the backtracking process from the first item with an empty allocation and zero scores
-    backtrack(0, [[] for _ in range(num_players)], [0] * num_players)
+    with phase("search"):
+        backtrack(0, [[] for _ in range(num_players)], [0] * num_players)
     return best_result["allocation"], best_result["min_value"]
 
-valuations = [
-    [4, 5, 6, 7, 8],
-    [8, 7, 6, 5, 4]
-]
+if __name__ == "__main__":
+    valuations = [
+        [4, 5, 6, 7, 8],
+        [8, 7, 6, 5, 4]
+    ]
 
-allocation, min_value = egalitarian_allocation(valuations)
+    allocation, min_value = egalitarian_allocation(valuations)
 
-for i, items in enumerate(allocation):
-    total = sum(valuations[i][j] for j in items)
-    print(f"Player {i} gets items {items} with value {total}")
+    for i, items in enumerate(allocation):
+        total = sum(valuations[i][j] for j in items)
+        print(f"Player {i} gets items {items} with value {total}")
@@ -0,0 +1,137 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+# Shared metrics / tracing surface for all the algorithms in this repository.
+#
+# Usage:
+#     with collect_metrics() as metrics:
+#         calculate_equilibrium(matrix, budgets)
+#     print(metrics.timings, metrics.solver)
+#
+# When no collect_metrics() block is active, phase() returns a shared no-op context manager
+# and current_metrics() returns None, so the instrumented code pays only one lookup per call.
+
+
+class Metrics:
+    """
+    Holds everything recorded inside one collect_metrics() block:
+    - timings:  accumulated seconds per phase ("build", "solve", "extract", "search", ...)
+    - counters: accumulated integer counters ("nodes_visited", "rule_b_prunes", ...)
+    - solver:   status / iterations / solver name of the last solver call
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.solver: Dict[str, object] = {}
+
+    def add_time(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def increment(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_solver(self, status, iterations=None, solver_name=None, solve_time=None):
+        self.solver = {
+            "status": status,
+            "iterations": iterations,
+            "solver_name": solver_name,
+            "solve_time": solve_time,
+        }
+
+    def as_dict(self) -> Dict[str, dict]:
+        return {"timings": dict(self.timings), "counters": dict(self.counters), "solver": dict(self.solver)}
+
+    def __repr__(self):
+        return f"Metrics(timings={self.timings}, counters={self.counters}, solver={self.solver})"
+
+
+_active_metrics: ContextVar[Optional[Metrics]] = ContextVar("active_metrics", default=None)
+
+
+def current_metrics() -> Optional[Metrics]:
+    """
+    Returns the Metrics object of the innermost active collect_metrics() block, or None when disabled.
+    """
+    return _active_metrics.get()
+
+
+@contextmanager
+def collect_metrics(callback: Optional[Callable[[Metrics], None]] = None):
+    """
+    Enables instrumentation for the enclosed block and yields the Metrics object being filled.
+    If a callback is given, it is called with the Metrics object when the block exits.
+    """
+    metrics = Metrics()
+    token = _active_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+        if callback is not None:
+            callback(metrics)
+
+
+class _Phase:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str):
+    """
+    Context manager timing one phase of an algorithm. A no-op when instrumentation is disabled.
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        return _NULL_PHASE
+    return _Phase(metrics, name)
+
+
+def record_cvxpy_solver(problem):
+    """
+    Records status, iteration count and solver name of a solved cvxpy problem.
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        return
+    stats = problem.solver_stats
+    if stats is None:
+        metrics.record_solver(problem.status)
+    else:
+        metrics.record_solver(problem.status, stats.num_iters, stats.solver_name, stats.solve_time)
+
+
+def record_scipy_result(result):
+    """
+    Records status and iteration count of a scipy.optimize result (linprog / milp).
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        return
+    metrics.record_solver(result.status, getattr(result, "nit", None), "HiGHS")
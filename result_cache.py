@@ -0,0 +1,242 @@
+import copy
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+# Content-addressed cache for the results of the allocation algorithms.
+#
+# The key of an entry is a SHA-256 hash of the algorithm name, its parameters and the canonicalized
+# bytes of every NumPy input (dtype + shape + contiguous data), so the same instance is recognised
+# no matter whether it arrives as a list of lists or as an array.
+#
+# Two tiers:
+#   - memory: a bounded LRU (OrderedDict), always on
+#   - disk:   optional; one directory per key holding the array parts as .npy files (re-opened with
+#             mmap_mode="r", so large allocations are paged in lazily) plus a small meta.json file
+#
+# The cached_* wrappers import the solver modules only on a miss, so a hit never pays for importing cvxpy.
+#
+# Results look the same on a miss and on a hit (memory or disk): lists and tuples are fresh copies, and arrays
+# are read-only plain np.ndarray views (memory-mapped parts of disk hits are not np.memmap objects).
+# Copy an array (np.array(part)) before modifying it.
+
+
+def _canonical_array(value) -> np.ndarray:
+    array = np.asarray(value)
+    if array.dtype.kind in "biu":
+        return np.ascontiguousarray(array, dtype=np.int64)
+    return np.ascontiguousarray(array, dtype=np.float64)
+
+
+def make_key(name: str, arrays, params: Optional[dict] = None) -> str:
+    """
+    Returns the content hash identifying one call: algorithm name + parameters + input arrays.
+    """
+    digest = hashlib.sha256()
+    digest.update(name.encode())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    for value in arrays:
+        array = _canonical_array(value)
+        digest.update(f"|{array.dtype.str}|{array.shape}|".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _share(value):
+    # Return arrays as read-only plain ndarray views and rebuild lists/tuples, so a caller that mutates
+    # its result cannot corrupt the cached entry, and misses and hits return the same types.
+    if isinstance(value, np.ndarray):
+        view = np.asarray(value).view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, tuple):
+        return tuple(_share(v) for v in value)
+    if isinstance(value, list):
+        return [_share(v) for v in value]
+    return value
+
+
+def _to_plain(value):
+    # Convert NumPy scalars / nested lists into JSON-serializable Python values
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ResultCache:
+    """
+    LRU result cache with an optional on-disk tier.
+
+    Args:
+        max_entries: maximum number of results kept in memory (least recently used are evicted first)
+        directory: if given, results are also written to / read from this directory
+    """
+
+    def __init__(self, max_entries: int = 128, directory: Optional[str] = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def get(self, key: str):
+        """
+        Returns the cached result for `key`, or None if it is in neither tier.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _share(self._entries[key])
+
+        if self.directory is not None:
+            result = self._load(key)
+            if result is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, result)
+                return _share(result)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result):
+        # Store a private deep copy: the caller keeps (and may mutate) `result`, including nested lists
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        if self.directory is not None:
+            self._store(key, result)
+
+    def get_or_compute(self, name: str, arrays, compute: Callable[[], object], params: Optional[dict] = None):
+        """
+        Returns the cached result of `name` on these inputs, calling `compute()` and caching its result on a miss.
+        Arrays in the result are read-only on a miss as well as on a hit.
+        """
+        key = make_key(name, arrays, params)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+            result = _share(result)
+        return result
+
+    def _remember(self, key: str, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _store(self, key: str, result):
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        parts = result if isinstance(result, tuple) else (result,)
+
+        # meta.json describes every part: either an array saved next to it, or a plain JSON value
+        meta = {"tuple": isinstance(result, tuple), "parts": []}
+        for idx, part in enumerate(parts):
+            if isinstance(part, np.ndarray) and part.dtype != object:
+                np.save(os.path.join(entry_dir, f"part{idx}.npy"), part)
+                meta["parts"].append({"kind": "array"})
+            else:
+                meta["parts"].append({"kind": "value", "value": _to_plain(part)})
+
+        # Write meta.json last (atomically) so a half-written entry is never read back
+        tmp_path = os.path.join(entry_dir, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(entry_dir, "meta.json"))
+
+    def _load(self, key: str):
+        meta_path = os.path.join(self._entry_dir(key), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        parts = []
+        for idx, part in enumerate(meta["parts"]):
+            if part["kind"] == "array":
+                parts.append(np.load(os.path.join(self._entry_dir(key), f"part{idx}.npy"), mmap_mode="r"))
+            else:
+                parts.append(part["value"])
+        return tuple(parts) if meta["tuple"] else parts[0]
+
+
+default_cache = ResultCache()
+
+
+def cached_calculate_equilibrium(matrix, budgets, cache: Optional[ResultCache] = None):
+    """
+    Cached version of calculate_equilibrium(matrix, budgets).
+    Arrays in the result are read-only views, on a miss as well as on a hit; copy them before modifying.
+    """
+    if cache is None:
+        cache = default_cache
+
+    def compute():
+        from Calculating_competitive_equilibrium import calculate_equilibrium
+        return calculate_equilibrium(matrix, budgets)
+
+    return cache.get_or_compute("calculate_equilibrium", [matrix, budgets], compute)
+
+
+def cached_egalitarian_division(matrix, cache: Optional[ResultCache] = None):
+    """
+    Cached version of Egalitarian_division(matrix).
+    Arrays in the result are read-only views, on a miss as well as on a hit; copy them before modifying.
+    """
+    if cache is None:
+        cache = default_cache
+
+    def compute():
+        from Egalitarian_division import Egalitarian_division
+        return Egalitarian_division(matrix)
+
+    return cache.get_or_compute("Egalitarian_division", [matrix], compute)
+
+
+def cached_egalitarian_allocation(valuations, cache: Optional[ResultCache] = None):
+    """
+    Cached version of egalitarian_allocation(valuations).
+    Arrays in the result are read-only views, on a miss as well as on a hit; copy them before modifying.
+    """
+    if cache is None:
+        cache = default_cache
+
+    def compute():
+        from egalitarian_allocation_with_pruning_a import egalitarian_allocation
+        return egalitarian_allocation(valuations)
+
+    return cache.get_or_compute("egalitarian_allocation", [valuations], compute)
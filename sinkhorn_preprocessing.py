@@ -0,0 +1,235 @@
+from typing import Tuple
+
+import numpy as np
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import connected_components, maximum_bipartite_matching
+
+# Pre-processing that turns the fractional allocations produced by Egalitarian_division / calculate_equilibrium
+# (only approximately stochastic, with solver noise such as -1e-10 or 0.9999999) into an exactly doubly
+# stochastic square matrix for birkhoff_von_neumann_decomposition, without changing the allocation itself:
+#
+#   1. clip solver noise: negative entries and entries below snap_tol become 0
+#   2. split every line with a total above 1 into unit-demand copies: an agent that receives 2.4 items in total
+#      becomes 3 rows holding at most 1 each (filled greedily in item order, so at most one entry per copy
+#      boundary is cut in two). The same is done for columns, so calculate_equilibrium output (resources x
+#      players) works in either orientation. Every copy remembers its original agent / item.
+#   3. pad to square with the slack of the real lines: with more rows than columns, dummy columns hold what every
+#      row is missing to a sum of 1; with more columns than rows, dummy rows hold what every column is missing.
+#      Such a padding exists when the lines on the smaller side sum to exactly 1 (up to slack_tol) - e.g. every
+#      item is fully allocated - otherwise ValueError is raised.
+#   4. Sinkhorn-Knopp: find positive vectors r, c such that diag(r) A diag(c) has all row and column sums 1.
+#      After the exact padding, r and c only absorb the solver noise (they stay within ~slack_tol of 1).
+#      Entries on no positive diagonal are dropped first (they are 0 in the limit, and keeping them makes the
+#      scaling converge sublinearly), and the result is checked against tol.
+#
+# A permutation of the result is an assignment of row copies to column copies; mapped back through the copy
+# maps it gives every agent the items of all its copies (dummy rows / columns map to -1).
+
+
+def split_unit_demand(matrix: np.ndarray, slack_tol: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits every row with a sum above 1 into ceil(sum) rows with sums of at most 1 (the last copy takes the
+    remainder). Returns the split matrix and, for every new row, the index of its original row.
+    """
+    row_sums = matrix.sum(axis=1)
+    copies = np.maximum(np.ceil(row_sums - slack_tol), 1).astype(np.int64)
+    owners = np.repeat(np.arange(matrix.shape[0]), copies)
+    if np.all(copies == 1):
+        return matrix.copy(), owners
+
+    split = np.zeros((len(owners), matrix.shape[1]))
+    first_copy = np.concatenate([[0], np.cumsum(copies)[:-1]])
+    for i in np.flatnonzero(copies > 1):
+        # Copy k holds the part of row i's mass that falls into [k, k + 1) along the cumulative sum
+        end = np.cumsum(matrix[i])
+        start = end - matrix[i]
+        for k in range(copies[i]):
+            upper = np.inf if k == copies[i] - 1 else k + 1
+            split[first_copy[i] + k] = np.clip(np.minimum(end, upper) - np.maximum(start, k), 0, None)
+    split[first_copy[copies == 1]] = matrix[copies == 1]
+    return split, owners
+
+
+def pad_to_square(matrix: np.ndarray, slack_tol: float = 1e-6) -> np.ndarray:
+    """
+    Pads a matrix whose lines sum to at most 1 with dummy rows or dummy columns that hold the slack of the
+    real columns / rows, so that the result is doubly stochastic up to slack_tol.
+    Raises ValueError when no such padding exists.
+    """
+    num_rows, num_columns = matrix.shape
+    size = max(num_rows, num_columns)
+    row_slack = 1 - matrix.sum(axis=1)
+    column_slack = 1 - matrix.sum(axis=0)
+
+    if np.any(row_slack < -slack_tol) or np.any(column_slack < -slack_tol):
+        raise ValueError("a row or column sums to more than 1; split it into unit-demand copies first.")
+    if num_rows >= num_columns and np.any(column_slack > slack_tol):
+        raise ValueError("every item must be fully allocated when there are at least as many (copies of) "
+                         "agents as items.")
+    if num_columns >= num_rows and np.any(row_slack > slack_tol):
+        raise ValueError("every agent must receive a total share of 1 when there are at least as many items "
+                         "as (copies of) agents.")
+
+    padded = np.zeros((size, size))
+    padded[:num_rows, :num_columns] = matrix
+    if num_rows > num_columns:
+        padded[:, num_columns:] = np.clip(row_slack, 0, None)[:, None] / (size - num_columns)
+    elif num_columns > num_rows:
+        padded[num_rows:, :] = np.clip(column_slack, 0, None)[None, :] / (size - num_rows)
+    return padded
+
+
+def drop_unsupported_entries(matrix: np.ndarray) -> np.ndarray:
+    """
+    Sets to 0 every positive entry that lies on no positive diagonal (no perfect matching of the support uses
+    it). Such entries vanish in any doubly stochastic scaling. Raises ValueError when the support has no
+    perfect matching at all.
+    """
+    n = matrix.shape[0]
+    support = csr_array(matrix > 0)
+    match = maximum_bipartite_matching(support, perm_type="column")
+    if np.any(match < 0):
+        raise ValueError("the support has no perfect matching, so it cannot be scaled to doubly stochastic.")
+
+    # An unmatched edge (i, j) lies on a perfect matching iff it closes an alternating cycle: iff row i and
+    # column j are in the same strongly connected component of (row -> column over unmatched edges,
+    # column -> row over matched edges)
+    rows, cols = support.nonzero()
+    unmatched = match[rows] != cols
+    graph = csr_array((np.ones(unmatched.sum() + n),
+                       (np.concatenate([rows[unmatched], n + match]),
+                        np.concatenate([n + cols[unmatched], np.arange(n)]))),
+                      shape=(2 * n, 2 * n))
+    _, component = connected_components(graph, directed=True, connection="strong")
+    unsupported = unmatched & (component[rows] != component[n + cols])
+
+    result = matrix.copy()
+    result[rows[unsupported], cols[unsupported]] = 0.0
+    return result
+
+
+def _scale(matrix: np.ndarray, tol: float, max_iterations: int) -> Tuple[np.ndarray, int, float]:
+    r = np.ones(matrix.shape[0])
+    c = np.ones(matrix.shape[1])
+    for iteration in range(1, max_iterations + 1):
+        row_sums = matrix @ c
+        # After a column step the columns are exact, so the row sums of diag(r) A diag(c) are the whole error
+        if iteration > 1 and np.max(np.abs(r * row_sums - 1)) <= tol:
+            break
+        r = 1.0 / row_sums              # rows sum to 1 after this step
+        c = 1.0 / (r @ matrix)          # columns sum to 1 after this step
+
+    scaled = r[:, None] * matrix * c[None, :]
+    error = max(np.abs(scaled.sum(axis=1) - 1).max(), np.abs(scaled.sum(axis=0) - 1).max())
+    return scaled, iteration, error
+
+
+def sinkhorn_knopp(matrix: np.ndarray, tol: float = 1e-12, max_iterations: int = 10000,
+                   quick_iterations: int = 50) -> Tuple[np.ndarray, int]:
+    """
+    Scales a non-negative square matrix to a doubly stochastic one.
+    Returns the scaled matrix and the number of iterations used.
+    Raises ValueError when the row and column sums are not within tol of 1 after max_iterations.
+    """
+    if np.any(matrix.sum(axis=1) <= 0) or np.any(matrix.sum(axis=0) <= 0):
+        raise ValueError("every row and column needs a positive entry to be scaled to doubly stochastic.")
+
+    # Matrices that are doubly stochastic up to noise (e.g. after pad_to_square) converge in a few iterations;
+    # only the others pay for the support analysis
+    scaled, iteration, error = _scale(matrix, tol, min(quick_iterations, max_iterations))
+    if error <= tol:
+        return scaled, iteration
+
+    scaled, more_iterations, error = _scale(drop_unsupported_entries(matrix), tol, max_iterations)
+    iteration += more_iterations
+    if not error <= tol:
+        raise ValueError(f"Sinkhorn-Knopp did not converge in {iteration} iterations "
+                         f"(max row/column error {error:.2e}).")
+    return scaled, iteration
+
+
+def prepare_for_birkhoff(allocation, snap_tol: float = 1e-9, slack_tol: float = 1e-6, tol: float = 1e-12,
+                         max_iterations: int = 10000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turns an (approximately stochastic, possibly non-square) agents x items allocation into a doubly
+    stochastic square matrix that can be passed directly to birkhoff_von_neumann_decomposition.
+    Agents (or items) with a total above 1 are split into unit-demand copies; apart from that, the real
+    entries only change by the solver noise (at most about slack_tol).
+
+    Returns:
+        (doubly_stochastic, row_agents, column_items) - row_agents[r] is the agent that row r is a copy of and
+        column_items[c] the item that column c is a copy of; dummy rows / columns map to -1
+    """
+    matrix = np.array(allocation, dtype=np.float64)
+    matrix[matrix < snap_tol] = 0.0
+
+    matrix, row_agents = split_unit_demand(matrix, slack_tol=slack_tol)
+    transposed, column_items = split_unit_demand(matrix.T, slack_tol=slack_tol)
+    matrix = transposed.T
+    # Entries cut at a copy boundary can leave noise-sized pieces
+    matrix[matrix < snap_tol] = 0.0
+
+    padded = pad_to_square(matrix, slack_tol=slack_tol)
+    scaled, _ = sinkhorn_knopp(padded, tol=tol, max_iterations=max_iterations)
+
+    size = len(scaled)
+    row_agents = np.concatenate([row_agents, np.full(size - len(row_agents), -1)])
+    column_items = np.concatenate([column_items, np.full(size - len(column_items), -1)])
+    return scaled, row_agents, column_items
+
+
+def lottery_from_terms(terms, row_agents: np.ndarray, column_items: np.ndarray, num_agents: int):
+    """
+    Maps (weight, permutation) terms over the prepared matrix back to (weight, bundles) over the original
+    agents, where bundles[i] is the sorted list of items agent i receives.
+    """
+    lottery = []
+    for weight, permutation in terms:
+        permutation = np.asarray(permutation)
+        if permutation.ndim == 2:  # permutation matrix, as returned by birkhoff_von_neumann_decomposition
+            permutation = permutation.argmax(axis=1)
+        bundles = [[] for _ in range(num_agents)]
+        for row, column in enumerate(permutation):
+            if row_agents[row] >= 0 and column_items[column] >= 0:
+                bundles[row_agents[row]].append(int(column_items[column]))
+        lottery.append((weight, [sorted(bundle) for bundle in bundles]))
+    return lottery
+
+
+if __name__ == "__main__":
+    import time
+
+    from birkhof_algorithm import birkhoff_von_neumann_decomposition
+    from Egalitarian_division import Egalitarian_division
+
+    # Egalitarian_division output (2 agents x 3 items): agent 1 receives about 1.5 items, so it becomes two rows
+    valuations = [
+        [81, 19, 1],
+        [70, 1, 29],
+    ]
+    allocation, _ = Egalitarian_division(valuations)
+    D, row_agents, column_items = prepare_for_birkhoff(allocation)
+    print("Egalitarian_division allocation:")
+    print(np.round(allocation, 4))
+    print(f"Doubly stochastic matrix (row copies of agents {row_agents}, columns of items {column_items}):")
+    print(np.round(D, 4))
+
+    decomposition = birkhoff_von_neumann_decomposition(D, verbose=False)
+    print("\nLottery over deterministic allocations:")
+    for weight, bundles in lottery_from_terms(decomposition, row_agents, column_items, len(valuations)):
+        print(f"  {weight:.4f}: " + ", ".join(f"agent {i+1} gets {[j+1 for j in b]}" for i, b in enumerate(bundles)))
+
+    # 1000 agents x 1000 items: a random column-stochastic allocation (many agents above one item)
+    rng = np.random.default_rng(0)
+    large = rng.random((1000, 1000))
+    large /= large.sum(axis=0, keepdims=True)
+    start = time.perf_counter()
+    D, row_agents, column_items = prepare_for_birkhoff(large)
+    elapsed = time.perf_counter() - start
+    real = np.zeros_like(large)
+    mask = (row_agents[:, None] >= 0) & (column_items[None, :] >= 0)
+    np.add.at(real, (np.broadcast_to(row_agents[:, None], D.shape)[mask],
+                     np.broadcast_to(column_items[None, :], D.shape)[mask]), D[mask])
+    print(f"\n1000x1000 -> {len(D)}x{len(D)}: {elapsed * 1000:.1f} ms, "
+          f"max row/column error {max(np.abs(D.sum(axis=0) - 1).max(), np.abs(D.sum(axis=1) - 1).max()):.2e}, "
+          f"max change of an agent's share {np.abs(real - large).max():.2e}")